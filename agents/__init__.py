@@ -4,5 +4,7 @@ from .intent_agent import IntentAgent
 from .emotion_agent import EmotionAgent
 from .risk_agent import RiskAgent
 from .rewrite_agent import RewriteAgent
+from .meta_agent import MetaAgent
+from ._cache import response_cache
 
-__all__ = ["IntentAgent", "EmotionAgent", "RiskAgent", "RewriteAgent"]
+__all__ = ["IntentAgent", "EmotionAgent", "RiskAgent", "RewriteAgent", "MetaAgent", "response_cache"]
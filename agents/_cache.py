@@ -0,0 +1,142 @@
+"""Response cache shared by all agents: an in-memory LRU in front of a sqlite file."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "commguard" / "responses.sqlite"
+
+# Cached prompts contain users' message text, so nothing is kept indefinitely
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+
+def make_key(*parts) -> str:
+    """Build a stable cache key from the parts that determine a response."""
+    joined = "\x1f".join(str(part) for part in parts)
+    return hashlib.blake2b(joined.encode(), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-level cache for raw LLM responses.
+
+    Lookups check the in-process LRU first, then the sqlite file, so repeat
+    messages skip the network entirely and survive process restarts. Entries
+    older than `ttl` seconds are ignored (ttl=None accepts any age); that is
+    only a read filter, so a short-lived ttl never deletes entries other
+    runs could use. Entries older than `retention` seconds are purged from
+    disk when the file is opened. Disk errors are swallowed so an unwritable
+    cache directory only costs the persistence layer, never the analysis.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, maxsize: int = 256, ttl: float = DEFAULT_TTL,
+                 retention: float = DEFAULT_TTL):
+        self.path = Path(path) if path else None
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.retention = retention
+        self.enabled = True
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, enabled: bool = None, ttl: float = None):
+        """Update settings in place; None leaves a setting unchanged."""
+        if enabled is not None:
+            self.enabled = enabled
+        if ttl is not None:
+            self.ttl = ttl
+
+    def _connection(self):
+        """Return this thread's sqlite connection, opening it on first use."""
+        if self.path is None:
+            return None
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            with conn:
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.retention,))
+            self._local.conn = conn
+        return conn
+
+    def _is_fresh(self, created_at: float) -> bool:
+        return self.ttl is None or time.time() - created_at <= self.ttl
+
+    def get(self, key: str):
+        """Return the cached value for key, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if self._is_fresh(created_at):
+                    self._memory.move_to_end(key)
+                    return value
+                del self._memory[key]
+
+        try:
+            conn = self._connection()
+            row = conn and conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except (OSError, sqlite3.Error):
+            return None
+
+        if row is None or not self._is_fresh(row[1]):
+            return None
+
+        self._remember(key, row[0], row[1])
+        return row[0]
+
+    def set(self, key: str, value: str):
+        """Store value under key in memory and on disk."""
+        if not self.enabled:
+            return
+
+        created_at = time.time()
+        self._remember(key, value, created_at)
+
+        try:
+            conn = self._connection()
+            if conn:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                        (key, value, created_at)
+                    )
+        except (OSError, sqlite3.Error):
+            pass
+
+    def _remember(self, key: str, value: str, created_at: float):
+        with self._lock:
+            self._memory[key] = (created_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached response, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+
+        try:
+            conn = self._connection()
+            if conn:
+                with conn:
+                    conn.execute("DELETE FROM responses")
+        except (OSError, sqlite3.Error):
+            pass
+
+
+response_cache = ResponseCache()
@@ -1,18 +1,158 @@
 """Base agent class for all specialized agents."""
 
+import asyncio
+import functools
 import json
 import os
+import re
+import string
+import threading
+from collections import Counter, defaultdict
 from pathlib import Path
+from typing import Callable
+import httpx
 from groq import Groq
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used without it
+    orjson = None
+
+from ._cache import make_key, response_cache
+
+
+# Separates the static instructions of a prompt file from its per-message input
+PROMPT_INPUT_MARKER = "=== INPUT ==="
+
+# Body of the first markdown code block, with or without a json language tag.
+# The closing fence is optional since streamed responses stop once the JSON closes.
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|\Z)", re.DOTALL)
+
+# Past ~10 messages per call, output quality drops faster than round-trips are saved
+BATCH_SIZE = 10
+MAX_BATCH_TOKENS = 8000
+
+
+# Most responses fit well under each agent's max_tokens, so calls start at
+# initial_max_tokens and retry at the ceiling only when cut off. Per-agent
+# counts let an agent that keeps truncating skip the low first attempt.
+AUTO_TUNE_MIN_CALLS = 20
+AUTO_TUNE_MAX_RETRY_RATE = 0.25
+token_cap_stats = defaultdict(Counter)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> Groq:
+    """
+    Return the Groq client shared by every agent.
+
+    One client means one connection pool, so concurrent agents reuse
+    keep-alive HTTPS connections instead of each paying its own TLS handshake.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Groq(
+                api_key=os.environ.get("GROQ_API_KEY"),
+                http_client=httpx.Client(
+                    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+                )
+            )
+        return _client
+
+
+def reset_client():
+    """
+    Forget the shared client without closing it.
+
+    For forked worker processes: the inherited client's pooled sockets and
+    lock belong to the parent, so the child must build its own.
+    """
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+def warm_up_client(timeout: float = 3.0):
+    """
+    Open a pooled connection to the API ahead of the first real call.
+
+    Issues a cheap models listing so DNS and the TLS handshake happen
+    off the critical path. Failures (offline, bad key) are ignored; the
+    first real call will surface them.
+    """
+    try:
+        get_client().with_options(timeout=timeout, max_retries=0).models.list()
+    except Exception:
+        pass
+
+
+@functools.lru_cache(maxsize=16)
+def _read_prompt(path: str) -> str:
+    """Read a prompt file once; prompts are static for the life of the process."""
+    return Path(path).read_text()
+
+
+def _parse_template(template: str) -> list[tuple]:
+    """Pre-parse a str.format template into (literal, field_name) pairs."""
+    return [(literal, field) for literal, field, _, _ in string.Formatter().parse(template)]
+
+
+def _render_template(parts: list[tuple], fields: dict) -> str:
+    """Fill a pre-parsed template; equivalent to template.format(**fields) for plain fields."""
+    return "".join(
+        literal + (str(fields[field]) if field is not None else "")
+        for literal, field in parts
+    )
+
+
+class _JsonCloseTracker:
+    """Tracks brace depth across streamed chunks to spot when the top-level JSON object closes."""
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; return True once the outermost object is closed."""
+        for ch in chunk:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"' and self.started:
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+                self.started = True
+            elif ch == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
 
 class BaseAgent:
     """Base class for specialized analysis agents."""
 
+    # Ceiling for one response, and the lower cap tried first (see _first_token_cap)
+    max_tokens = 1000
+    initial_max_tokens = 800
+
     def __init__(self, prompt_file: str, model: str = "llama-3.3-70b-versatile"):
-        self.client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+        self.client = get_client()
         self.model = model
-        self.prompt_template = self._load_prompt(prompt_file)
+        self.system_prompt, self.prompt_template = self._split_prompt(self._load_prompt(prompt_file))
+        self.batch_template = self._load_prompt("batch.txt")
+        self._prompt_parts = _parse_template(self.prompt_template)
+        self._batch_parts = _parse_template(self.batch_template)
 
     def _load_prompt(self, prompt_file: str) -> str:
         """Load prompt template from file."""
@@ -22,31 +162,240 @@ class BaseAgent:
         if not prompt_path.exists():
             raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
 
-        return prompt_path.read_text()
+        return _read_prompt(str(prompt_path))
+
+    def _split_prompt(self, prompt: str) -> tuple:
+        """
+        Split a prompt file into (system_prompt, user_template).
 
-    def _parse_json_response(self, response_text: str) -> dict:
-        """Parse JSON from response, handling markdown code blocks."""
-        text = response_text.strip()
+        Everything above PROMPT_INPUT_MARKER is sent verbatim as the system
+        message, so it is byte-identical on every call and can be served from
+        the provider's prompt prefix cache. Only the part below the marker is
+        formatted with the message and context. Files without a marker are
+        treated as a single user template.
+        """
+        if PROMPT_INPUT_MARKER not in prompt:
+            return None, prompt
 
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
+        system_prompt, user_template = prompt.split(PROMPT_INPUT_MARKER, 1)
+        return system_prompt.strip(), user_template.strip()
+
+    def _parse_json_response(self, response_text: str):
+        """
+        Parse JSON from response, handling markdown code blocks.
+
+        Returns the decoded object (a dict, or a list for batch responses), or
+        an error dict if the response isn't valid JSON.
+        """
+        match = _FENCE_RE.search(response_text)
+        text = match.group(1) if match else response_text
 
         try:
+            if orjson is not None:
+                return orjson.loads(text.strip())
             return json.loads(text.strip())
-        except json.JSONDecodeError as e:
+        except json.JSONDecodeError as e:  # orjson.JSONDecodeError subclasses this
             return {"error": f"Failed to parse response: {e}", "raw": response_text}
 
+    def _prompt_fields(self, message: str, context: dict = None) -> dict:
+        """Return the fields used to fill the user template. Override to add context."""
+        return {"message": message}
+
+    def _render(self, message: str, context: dict = None) -> str:
+        """Fill the user template for one message from its pre-parsed parts."""
+        return _render_template(self._prompt_parts, self._prompt_fields(message, context))
+
     def analyze(self, message: str, context: dict = None) -> dict:
         """Run analysis on the message. Override in subclasses."""
         raise NotImplementedError("Subclasses must implement analyze()")
 
-    def _call_api(self, prompt: str, max_tokens: int = 1000) -> str:
-        """Make API call to Groq."""
+    async def analyze_async(self, message: str, context: dict = None, **kwargs) -> dict:
+        """Run analyze() in a worker thread so independent agents can overlap."""
+        return await asyncio.to_thread(self.analyze, message, context, **kwargs)
+
+    def analyze_batch(self, messages: list[str], contexts: list[dict] = None) -> list[dict]:
+        """
+        Analyze several messages with one API call per chunk of BATCH_SIZE.
+
+        The per-message user templates are numbered and concatenated under the
+        shared system prompt, and the model answers with a JSON array. If a
+        chunk's response doesn't come back as one object per message, that
+        chunk falls back to individual analyze() calls.
+
+        Returns:
+            list[dict]: One result per message, in input order, each shaped
+            like the return value of analyze().
+        """
+        contexts = contexts or [None] * len(messages)
+        results = []
+        for start in range(0, len(messages), BATCH_SIZE):
+            results.extend(self._analyze_chunk(
+                messages[start:start + BATCH_SIZE],
+                contexts[start:start + BATCH_SIZE]
+            ))
+        return results
+
+    async def analyze_batch_async(self, messages: list[str], contexts: list[dict] = None) -> list[dict]:
+        """Run analyze_batch() in a worker thread so independent agents can overlap."""
+        return await asyncio.to_thread(self.analyze_batch, messages, contexts)
+
+    def _analyze_chunk(self, messages: list[str], contexts: list) -> list[dict]:
+        """Analyze up to BATCH_SIZE messages in a single API call."""
+        # The batch prompt refers back to the schema in the system prompt
+        if len(messages) == 1 or not self.system_prompt:
+            return [self.analyze(m, c) for m, c in zip(messages, contexts)]
+
+        items = "\n\n".join(
+            f"### Message {i}\n{self._render(m, c)}"
+            for i, (m, c) in enumerate(zip(messages, contexts), 1)
+        )
+        prompt = _render_template(self._batch_parts, {"count": len(messages), "items": items})
+
+        def is_complete(parsed) -> bool:
+            return (
+                isinstance(parsed, list)
+                and len(parsed) == len(messages)
+                and all(isinstance(r, dict) for r in parsed)
+            )
+
+        response = self._call_api(
+            prompt,
+            max_tokens=min(self.max_tokens * len(messages), MAX_BATCH_TOKENS),
+            initial_max_tokens=self.initial_max_tokens * len(messages),
+            validate=lambda text: is_complete(self._parse_json_response(text))
+        )
+        parsed = self._parse_json_response(response)
+
+        if is_complete(parsed):
+            return parsed
+        return [self.analyze(m, c) for m, c in zip(messages, contexts)]
+
+    def _build_messages(self, prompt: str) -> list[dict]:
+        """Pair the static system prompt with the formatted user prompt."""
+        messages = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _first_token_cap(self, max_tokens: int, initial_max_tokens: int = None) -> int:
+        """
+        Pick max_tokens for the first attempt at a call.
+
+        Starts at the agent's lower initial cap, but agents whose responses
+        keep getting cut off there go straight to the full ceiling.
+        """
+        stats = token_cap_stats[type(self).__name__]
+        if stats["calls"] >= AUTO_TUNE_MIN_CALLS and stats["retries"] > stats["calls"] * AUTO_TUNE_MAX_RETRY_RATE:
+            return max_tokens
+        return min(initial_max_tokens or self.initial_max_tokens, max_tokens)
+
+    def _record_token_cap(self, retried: bool):
+        stats = token_cap_stats[type(self).__name__]
+        stats["calls"] += 1
+        if retried:
+            stats["retries"] += 1
+
+    def _parses(self, response_text: str) -> bool:
+        """Default cache check: whether a response decodes to JSON at all."""
+        parsed = self._parse_json_response(response_text)
+        return not (isinstance(parsed, dict) and "error" in parsed)
+
+    def _call_api(self, prompt: str, max_tokens: int = None, initial_max_tokens: int = None,
+                  validate: Callable[[str], bool] = None) -> str:
+        """
+        Make API call to Groq, serving repeats from the response cache.
+
+        max_tokens is the ceiling. Most responses fit well under it, so the
+        first attempt uses a lower cap (see _first_token_cap) and a response
+        truncated at that cap is retried once with the full ceiling.
+
+        Only responses that pass validate (by default, that parse as JSON)
+        are cached, so a malformed answer is asked for again next time
+        instead of being served from the cache.
+        """
+        max_tokens = max_tokens or self.max_tokens
+        key = make_key(self.model, max_tokens, self.system_prompt, prompt)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+
+        cap = self._first_token_cap(max_tokens, initial_max_tokens)
+        content, finish_reason = self._complete(prompt, cap)
+        retried = finish_reason == "length" and cap < max_tokens
+        if retried:
+            content, finish_reason = self._complete(prompt, max_tokens)
+        self._record_token_cap(retried)
+
+        # Truncated responses are unlikely to parse, so don't pin them in the cache
+        if finish_reason != "length" and (validate or self._parses)(content):
+            response_cache.set(key, content)
+        return content
+
+    def _complete(self, prompt: str, max_tokens: int) -> tuple:
+        """Run one non-streamed completion; return (content, finish_reason)."""
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=self._build_messages(prompt),
             max_tokens=max_tokens
         )
-        return response.choices[0].message.content
+        choice = response.choices[0]
+        return choice.message.content, choice.finish_reason
+
+    def _call_api_stream(self, prompt: str, max_tokens: int = None, on_chunk: Callable[[int], None] = None,
+                         validate: Callable[[str], bool] = None) -> str:
+        """
+        Stream an API call to Groq and return the response text.
+
+        on_chunk is called with the running chunk count as pieces arrive. The
+        stream is closed as soon as the top-level JSON object is complete, so
+        trailing tokens (closing code fences, commentary) aren't waited on.
+        Shares the response cache, its validate check and the truncation
+        retry with _call_api().
+        """
+        max_tokens = max_tokens or self.max_tokens
+        key = make_key(self.model, max_tokens, self.system_prompt, prompt)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+
+        cap = self._first_token_cap(max_tokens)
+        content, finish_reason = self._stream(prompt, cap, on_chunk)
+        retried = finish_reason == "length" and cap < max_tokens
+        if retried:
+            content, finish_reason = self._stream(prompt, max_tokens, on_chunk)
+        self._record_token_cap(retried)
+
+        if finish_reason != "length" and (validate or self._parses)(content):
+            response_cache.set(key, content)
+        return content
+
+    def _stream(self, prompt: str, max_tokens: int, on_chunk: Callable[[int], None] = None) -> tuple:
+        """Run one streamed completion; return (content, finish_reason)."""
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(prompt),
+            max_tokens=max_tokens,
+            stream=True
+        )
+
+        parts = []
+        tracker = _JsonCloseTracker()
+        finish_reason = None
+        try:
+            for chunk in stream:
+                choice = chunk.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                text = choice.delta.content
+                if not text:
+                    continue
+
+                parts.append(text)
+                if on_chunk:
+                    on_chunk(len(parts))
+                if tracker.feed(text):
+                    break
+        finally:
+            stream.close()
+
+        return "".join(parts), finish_reason
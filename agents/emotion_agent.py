@@ -27,6 +27,6 @@ class EmotionAgent(BaseAgent):
                 "tone_descriptors": list[str]
             }
         """
-        prompt = self.prompt_template.format(message=message)
+        prompt = self._render(message, context)
         response = self._call_api(prompt)
         return self._parse_json_response(response)
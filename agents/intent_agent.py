@@ -22,6 +22,6 @@ class IntentAgent(BaseAgent):
                 "hidden_agenda": str | None
             }
         """
-        prompt = self.prompt_template.format(message=message)
+        prompt = self._render(message, context)
         response = self._call_api(prompt)
         return self._parse_json_response(response)
@@ -0,0 +1,62 @@
+"""Meta Agent - Runs intent, emotion, risk and rewrite analysis in a single call."""
+
+from .base_agent import BaseAgent
+
+
+class MetaAgent(BaseAgent):
+    """Agent that covers all four analyses with one prompt and one response."""
+
+    # Roughly the four agents' responses combined
+    max_tokens = 4000
+    initial_max_tokens = 2500
+
+    # Keys each section must carry for the result to stand in for the individual agents
+    REQUIRED_KEYS = {
+        "intent": ("primary_intent",),
+        "emotion": ("primary_emotion",),
+        "risk": ("overall_risk_score",),
+        "rewrite": ("needs_rewrite",)
+    }
+
+    def __init__(self):
+        super().__init__(prompt_file="meta.txt")
+
+    def analyze(self, message: str, context: dict = None) -> dict:
+        """
+        Analyze intent, emotion, risk and rewrites for a message at once.
+
+        Sends the message once under one system prompt instead of four,
+        trading four round-trips for one longer response.
+
+        Returns:
+            dict: {
+                "intent": dict shaped like IntentAgent.analyze(),
+                "emotion": dict shaped like EmotionAgent.analyze(),
+                "risk": dict shaped like RiskAgent.analyze(),
+                "rewrite": dict shaped like RewriteAgent.analyze()
+            }
+            or an error dict if the response doesn't match that schema, in
+            which case callers should fall back to the individual agents.
+        """
+        prompt = self._render(message, context)
+        # Only schema-valid answers are cached, so a malformed one is retried
+        response = self._call_api(prompt, validate=lambda text: self.is_valid(self._parse_json_response(text)))
+        result = self._parse_json_response(response)
+
+        if not self.is_valid(result):
+            return {"error": "Combined response did not match the expected schema", "raw": response}
+        return result
+
+    @classmethod
+    def is_valid(cls, result) -> bool:
+        """Check that a combined result has every section and its key fields."""
+        if not isinstance(result, dict):
+            return False
+
+        for section, keys in cls.REQUIRED_KEYS.items():
+            data = result.get(section)
+            if not isinstance(data, dict) or any(key not in data for key in keys):
+                return False
+
+        score = result["risk"]["overall_risk_score"]
+        return isinstance(score, (int, float)) and not isinstance(score, bool)
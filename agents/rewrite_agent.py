@@ -1,21 +1,29 @@
 """Rewrite Agent - Suggests improved versions of risky messages."""
 
+from typing import Callable
+
 from .base_agent import BaseAgent
 
 
 class RewriteAgent(BaseAgent):
     """Agent specialized in suggesting message improvements."""
 
+    max_tokens = 1500
+
     def __init__(self):
         super().__init__(prompt_file="rewrite.txt")
 
-    def analyze(self, message: str, context: dict = None) -> dict:
+    def analyze(self, message: str, context: dict = None, on_chunk: Callable[[int], None] = None) -> dict:
         """
         Generate improved versions of a message.
 
+        The response is streamed, since it is the longest of the four, and
+        parsed as soon as the JSON object closes.
+
         Args:
             message: The original message
             context: Dict with 'intent', 'emotion', and 'risk' analysis results
+            on_chunk: Optional callback receiving the running chunk count
 
         Returns:
             dict: {
@@ -38,24 +46,27 @@ class RewriteAgent(BaseAgent):
                 "general_advice": str
             }
         """
-        # Build context from other agents
-        context_str = ""
+        prompt = self._render(message, context)
+        response = self._call_api_stream(prompt, on_chunk=on_chunk)
+        return self._parse_json_response(response)
+
+    def _prompt_fields(self, message: str, context: dict = None) -> dict:
+        """Summarize the intent, emotion and risk results for the prompt."""
+        parts: list[str] = []
         if context:
             if "intent" in context:
-                context_str += f"\nDetected Intent: {context['intent'].get('primary_intent', 'unknown')}"
+                parts.append(f"Detected Intent: {context['intent'].get('primary_intent', 'unknown')}")
             if "emotion" in context:
                 emo = context["emotion"]
-                context_str += f"\nEmotional Tone: {emo.get('primary_emotion', 'unknown')} (intensity: {emo.get('intensity', 'unknown')})"
+                parts.append(f"Emotional Tone: {emo.get('primary_emotion', 'unknown')} (intensity: {emo.get('intensity', 'unknown')})")
                 if emo.get("emotional_leakage", {}).get("detected"):
-                    context_str += f"\nEmotional Leakage: {emo['emotional_leakage'].get('explanation', '')}"
+                    parts.append(f"Emotional Leakage: {emo['emotional_leakage'].get('explanation', '')}")
             if "risk" in context:
                 risk = context["risk"]
-                context_str += f"\nRisk Score: {risk.get('overall_risk_score', '?')}/10"
+                parts.append(f"Risk Score: {risk.get('overall_risk_score', '?')}/10")
                 red_flags = risk.get("red_flags", [])
                 if red_flags:
                     flags = [f.get("phrase", "") for f in red_flags]
-                    context_str += f"\nRed Flags: {', '.join(flags)}"
+                    parts.append(f"Red Flags: {', '.join(flags)}")
 
-        prompt = self.prompt_template.format(message=message, context=context_str)
-        response = self._call_api(prompt, max_tokens=1500)
-        return self._parse_json_response(response)
+        return {"message": message, "context": "\n".join(parts)}
@@ -6,6 +6,8 @@ from .base_agent import BaseAgent
 class RiskAgent(BaseAgent):
     """Agent specialized in identifying communication risks."""
 
+    max_tokens = 1500
+
     def __init__(self):
         super().__init__(prompt_file="risk.txt")
 
@@ -42,14 +44,17 @@ class RiskAgent(BaseAgent):
                 "ambiguities": list[str]
             }
         """
-        # Include context from other agents if available
-        context_str = ""
+        prompt = self._render(message, context)
+        response = self._call_api(prompt)
+        return self._parse_json_response(response)
+
+    def _prompt_fields(self, message: str, context: dict = None) -> dict:
+        """Pass the intent and emotion results along as context, if available."""
+        parts: list[str] = []
         if context:
             if "intent" in context:
-                context_str += f"\nIntent Analysis: {context['intent']}"
+                parts.append(f"Intent Analysis: {context['intent']}")
             if "emotion" in context:
-                context_str += f"\nEmotion Analysis: {context['emotion']}"
+                parts.append(f"Emotion Analysis: {context['emotion']}")
 
-        prompt = self.prompt_template.format(message=message, context=context_str)
-        response = self._call_api(prompt, max_tokens=1500)
-        return self._parse_json_response(response)
+        return {"message": message, "context": "\n".join(parts)}
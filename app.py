@@ -4,81 +4,277 @@ Communication Intent & Risk Guard
 Main application orchestrating multi-agent analysis.
 """
 
-import click
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.text import Text
-from rich import box
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import io
+import logging
+import math
+import os
+import threading
+from typing import Callable
 
-from agents import IntentAgent, EmotionAgent, RiskAgent, RewriteAgent
+import click
 
-console = Console()
+# rich and the agents (which pull in the Groq SDK) are imported where they're
+# used, so `--help` and argument errors don't pay for them at startup.
+
+logger = logging.getLogger(__name__)
+
+# Short messages with one of these intents, detected with high confidence and
+# no hidden agenda, skip the emotion and risk agents. Request and apologize are
+# left out: they are what short passive-aggressive messages get classified as
+# ("Can you just do your job for once?"). Tune against the fast/full path
+# log lines, shown with --verbose.
+BENIGN_INTENTS = {"inform", "connect"}
+FAST_PATH_MAX_CHARS = 80
+
+BENIGN_EMOTION = {
+    "primary_emotion": "neutral",
+    "intensity": "low",
+    "secondary_emotions": [],
+    "emotional_leakage": {"detected": False},
+    "tone_descriptors": []
+}
+BENIGN_RISK = {
+    "overall_risk_score": 1,
+    "risk_level": "low",
+    "misinterpretation_risks": [],
+    "red_flags": [],
+    "missing_context": [],
+    "ambiguities": []
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_console():
+    """Return the shared Rich console, creating it on first use."""
+    from rich.console import Console
+    return Console()
+
+
+def run_async(coro):
+    """Run a coroutine to completion on uvloop if it's installed, else on the stdlib loop."""
+    try:
+        import uvloop
+    except ImportError:  # optional speedup
+        return asyncio.run(coro)
+
+    # uvloop.run only exists from 0.18; older releases fall back to the stdlib loop
+    if not hasattr(uvloop, "run"):
+        return asyncio.run(coro)
+    return uvloop.run(coro)
+
+
+def is_obviously_benign(message: str, intent: dict) -> bool:
+    """Return True if a short message's intent is benign, high-confidence and without a hidden agenda."""
+    if "error" in intent or intent.get("hidden_agenda") or len(message) >= FAST_PATH_MAX_CHARS:
+        return False
+    primary = str(intent.get("primary_intent", "")).strip().lower()
+    confidence = str(intent.get("confidence", "")).strip().lower()
+    return primary in BENIGN_INTENTS and confidence == "high"
 
 
 class CommunicationGuard:
     """Orchestrates multi-agent message analysis."""
 
-    def __init__(self):
+    def __init__(self, warmup: bool = True):
+        from agents import IntentAgent, EmotionAgent, RiskAgent, RewriteAgent
+        from agents.base_agent import warm_up_client
+
         self.intent_agent = IntentAgent()
         self.emotion_agent = EmotionAgent()
         self.risk_agent = RiskAgent()
         self.rewrite_agent = RewriteAgent()
 
-    def analyze(self, message: str, include_rewrite: bool = True) -> dict:
+        # Open the API connection in the background while the user types
+        if warmup:
+            threading.Thread(target=warm_up_client, daemon=True).start()
+
+    async def analyze(
+        self,
+        message: str,
+        include_rewrite: bool = True,
+        show_progress: bool = True,
+        force_full: bool = False,
+        on_token: Callable[[int], None] = None
+    ) -> dict:
         """
         Run full analysis pipeline on a message.
 
         Pipeline:
-        1. Intent Agent -> Detect sender's intent
-        2. Emotion Agent -> Analyze emotional content
-        3. Risk Agent -> Identify misinterpretation risks (uses intent + emotion context)
-        4. Rewrite Agent -> Suggest improvements (uses all previous context)
+        1. Intent + Emotion Agents -> Run concurrently (independent of each other)
+        2. Risk Agent -> Identify misinterpretation risks (uses intent + emotion context)
+        3. Rewrite Agent -> Suggest improvements (uses all previous context)
+
+        Short messages run Intent on its own first; if it is confidently
+        benign (see is_obviously_benign), the remaining agents are skipped and
+        a low-risk result is synthesized. Risky short messages pay for intent
+        and emotion in series, which is what lets benign ones skip emotion. Pass force_full to always run every
+        agent. on_token receives the running chunk count while the rewrite
+        streams in.
         """
+        console = get_console()
         results = {}
 
-        # Stage 1: Intent Analysis
-        console.print("  [dim]Analyzing intent...[/dim]")
-        results["intent"] = self.intent_agent.analyze(message)
-
-        # Stage 2: Emotion Analysis
-        console.print("  [dim]Detecting emotions...[/dim]")
-        results["emotion"] = self.emotion_agent.analyze(message)
-
-        # Stage 3: Risk Assessment (with context from intent + emotion)
-        console.print("  [dim]Assessing risks...[/dim]")
-        results["risk"] = self.risk_agent.analyze(message, context={
+        # Stage 1: Intent + Emotion Analysis (independent, so run together)
+        if not force_full and len(message) < FAST_PATH_MAX_CHARS:
+            # Emotion waits for intent here: a call already running in a worker
+            # thread can't be cancelled, so starting it early would spend it anyway.
+            if show_progress:
+                console.print("  [dim]Analyzing intent...[/dim]")
+            results["intent"] = await self.intent_agent.analyze_async(message)
+
+            if is_obviously_benign(message, results["intent"]):
+                logger.info("fast path: intent=%r len=%d", results["intent"].get("primary_intent"), len(message))
+                if show_progress:
+                    console.print("  [dim]Clearly benign, skipping emotion and risk analysis[/dim]")
+                results["emotion"] = dict(BENIGN_EMOTION)
+                results["risk"] = dict(BENIGN_RISK)
+                return results
+
+            logger.info("full path: intent=%r len=%d", results["intent"].get("primary_intent"), len(message))
+            if show_progress:
+                console.print("  [dim]Detecting emotions...[/dim]")
+            results["emotion"] = await self.emotion_agent.analyze_async(message)
+        else:
+            if show_progress:
+                console.print("  [dim]Analyzing intent and emotions...[/dim]")
+            results["intent"], results["emotion"] = await asyncio.gather(
+                self.intent_agent.analyze_async(message),
+                self.emotion_agent.analyze_async(message)
+            )
+
+        # Stage 2: Risk Assessment (with context from intent + emotion)
+        if show_progress:
+            console.print("  [dim]Assessing risks...[/dim]")
+        results["risk"] = await self.risk_agent.analyze_async(message, context={
             "intent": results["intent"],
             "emotion": results["emotion"]
         })
 
-        # Stage 4: Rewrite Suggestions (with full context)
+        # Stage 3: Rewrite Suggestions (with full context)
         if include_rewrite:
             risk_score = results["risk"].get("overall_risk_score", 0)
             if risk_score >= 4:  # Only suggest rewrites for risky messages
-                console.print("  [dim]Generating suggestions...[/dim]")
-                results["rewrite"] = self.rewrite_agent.analyze(message, context=results)
+                if show_progress:
+                    console.print("  [dim]Generating suggestions...[/dim]")
+                results["rewrite"] = await self.rewrite_agent.analyze_async(
+                    message, context=results, on_chunk=on_token
+                )
+
+        return results
+
+    async def analyze_batch(self, messages: list[str], include_rewrite: bool = True) -> list[dict]:
+        """
+        Run the pipeline over a chunk of messages with one API call per agent.
+
+        Same stages as analyze(), but each agent sees every message of the
+        chunk in a single prompt. Rewrites are only requested for the
+        messages whose risk score warrants one.
+        """
+        intents, emotions = await asyncio.gather(
+            self.intent_agent.analyze_batch_async(messages),
+            self.emotion_agent.analyze_batch_async(messages)
+        )
+
+        risks = await self.risk_agent.analyze_batch_async(messages, [
+            {"intent": intent, "emotion": emotion} for intent, emotion in zip(intents, emotions)
+        ])
+
+        results = [
+            {"intent": intent, "emotion": emotion, "risk": risk}
+            for intent, emotion, risk in zip(intents, emotions, risks)
+        ]
+
+        if include_rewrite:
+            risky = [i for i, r in enumerate(results) if r["risk"].get("overall_risk_score", 0) >= 4]
+            if risky:
+                rewrites = await self.rewrite_agent.analyze_batch_async(
+                    [messages[i] for i in risky],
+                    [results[i] for i in risky]
+                )
+                for i, rewrite in zip(risky, rewrites):
+                    results[i]["rewrite"] = rewrite
 
         return results
 
+    async def analyze_many(
+        self,
+        messages: list[str],
+        include_rewrite: bool = True,
+        concurrency: int = 4,
+        on_progress: Callable[[int], None] = None,
+        force_full: bool = False
+    ) -> list:
+        """
+        Run the pipeline over several messages concurrently.
+
+        Messages are grouped into chunks for analyze_batch(), sized so there
+        are enough chunks to keep `concurrency` pipelines busy but never more
+        than BATCH_SIZE messages per prompt. At most `concurrency` chunks are in
+        flight at once to stay under the provider's rate limit. Results are
+        returned in input order; a message whose chunk raised is returned as
+        the exception instead of a dict. force_full only matters for
+        single-message chunks, since batched chunks always run every agent.
+        """
+        from agents.base_agent import BATCH_SIZE
+
+        concurrency = max(1, concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        chunk_size = max(1, min(BATCH_SIZE, math.ceil(len(messages) / concurrency)))
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+
+        async def run_chunk(chunk: list[str]) -> list:
+            async with semaphore:
+                try:
+                    if len(chunk) == 1:
+                        return [await self.analyze(
+                            chunk[0], include_rewrite=include_rewrite, show_progress=False, force_full=force_full
+                        )]
+                    return await self.analyze_batch(chunk, include_rewrite=include_rewrite)
+                except Exception as e:
+                    return [e] * len(chunk)
+                finally:
+                    if on_progress:
+                        on_progress(len(chunk))
+
+        chunk_results = await asyncio.gather(*(run_chunk(c) for c in chunks))
+        return [result for chunk in chunk_results for result in chunk]
+
+
+# Color for each risk score 0-10; scores outside the range are clamped
+RISK_COLORS = ("green",) * 4 + ("yellow",) * 3 + ("red",) * 4
+SEVERITY_STYLES = {"low": "green", "medium": "yellow", "high": "red"}
+
 
 def get_risk_color(score: int) -> str:
     """Return color based on risk score."""
-    if score <= 3:
-        return "green"
-    elif score <= 6:
-        return "yellow"
-    else:
-        return "red"
+    return RISK_COLORS[min(max(score, 0), 10)]
 
 
 def get_severity_style(severity: str) -> str:
     """Return style based on severity."""
-    return {"low": "green", "medium": "yellow", "high": "red"}.get(severity.lower(), "white")
+    return SEVERITY_STYLES.get(severity.lower(), "white")
 
 
-def display_results(message: str, results: dict):
-    """Display analysis results in a formatted way."""
+def display_results(message: str, results: dict, console=None):
+    """
+    Display analysis results in a formatted way.
+
+    Sections are collected into one Group and printed once, so Rich
+    renders and flushes a single frame per message. Prints to the shared
+    console unless another one is given.
+    """
+    from rich import box
+    from rich.console import Group
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich.text import Text
+
+    console = console or get_console()
+    out = []
 
     # Header with risk score
     risk = results.get("risk", {})
@@ -86,14 +282,14 @@ def display_results(message: str, results: dict):
     risk_level = risk.get("risk_level", "unknown")
     risk_color = get_risk_color(risk_score) if isinstance(risk_score, int) else "white"
 
-    console.print()
-    console.print(Panel(
+    out.append("")
+    out.append(Panel(
         f"[dim]{message[:100]}{'...' if len(message) > 100 else ''}[/dim]",
         title="[bold]Message Analyzed[/bold]",
         border_style="dim"
     ))
 
-    console.print(Panel(
+    out.append(Panel(
         f"[bold]Risk Score: [{risk_color}]{risk_score}/10[/{risk_color}][/bold] ({risk_level.upper()})",
         title="[bold blue]Analysis Results[/bold blue]",
         border_style="blue"
@@ -102,52 +298,52 @@ def display_results(message: str, results: dict):
     # Intent Section
     intent = results.get("intent", {})
     if "error" not in intent:
-        console.print()
-        console.print("[bold cyan]Intent Detection[/bold cyan]")
-        console.print(f"  Primary: [bold]{intent.get('primary_intent', 'Unknown')}[/bold]")
+        out.append("")
+        out.append("[bold cyan]Intent Detection[/bold cyan]")
+        out.append(f"  Primary: [bold]{intent.get('primary_intent', 'Unknown')}[/bold]")
         secondary = intent.get("secondary_intents", [])
         if secondary:
-            console.print(f"  Secondary: {', '.join(secondary)}")
-        console.print(f"  Confidence: {intent.get('confidence', 'Unknown')}")
-        console.print(f"  [dim]{intent.get('explanation', '')}[/dim]")
+            out.append(f"  Secondary: {', '.join(secondary)}")
+        out.append(f"  Confidence: {intent.get('confidence', 'Unknown')}")
+        out.append(f"  [dim]{intent.get('explanation', '')}[/dim]")
         if intent.get("hidden_agenda"):
-            console.print(f"  [yellow]Hidden agenda:[/yellow] {intent['hidden_agenda']}")
+            out.append(f"  [yellow]Hidden agenda:[/yellow] {intent['hidden_agenda']}")
 
     # Emotion Section
     emotion = results.get("emotion", {})
     if "error" not in emotion:
-        console.print()
-        console.print("[bold cyan]Emotional Analysis[/bold cyan]")
-        console.print(
+        out.append("")
+        out.append("[bold cyan]Emotional Analysis[/bold cyan]")
+        out.append(
             f"  Primary: [bold]{emotion.get('primary_emotion', 'Unknown')}[/bold] "
             f"(intensity: {emotion.get('intensity', 'Unknown')})"
         )
         secondary = emotion.get("secondary_emotions", [])
         if secondary:
-            console.print(f"  Secondary: {', '.join(secondary)}")
+            out.append(f"  Secondary: {', '.join(secondary)}")
         tone = emotion.get("tone_descriptors", [])
         if tone:
-            console.print(f"  Tone: {', '.join(tone)}")
+            out.append(f"  Tone: {', '.join(tone)}")
 
         leakage = emotion.get("emotional_leakage", {})
         if leakage.get("detected"):
-            console.print()
-            console.print("  [yellow]Emotional Leakage Detected[/yellow]")
+            out.append("")
+            out.append("  [yellow]Emotional Leakage Detected[/yellow]")
             leaked = leakage.get("leaked_emotions", [])
             if leaked:
-                console.print(f"    Leaked emotions: {', '.join(leaked)}")
+                out.append(f"    Leaked emotions: {', '.join(leaked)}")
             indicators = leakage.get("indicators", [])
             for ind in indicators[:3]:
-                console.print(f"    [dim]- \"{ind}\"[/dim]")
-            console.print(f"    {leakage.get('explanation', '')}")
+                out.append(f"    [dim]- \"{ind}\"[/dim]")
+            out.append(f"    {leakage.get('explanation', '')}")
 
     # Risk Section
     if "error" not in risk:
         # Misinterpretation Risks
         risks_list = risk.get("misinterpretation_risks", [])
         if risks_list:
-            console.print()
-            console.print("[bold cyan]Misinterpretation Risks[/bold cyan]")
+            out.append("")
+            out.append("[bold cyan]Misinterpretation Risks[/bold cyan]")
 
             risk_table = Table(box=box.ROUNDED, show_header=True, header_style="bold")
             risk_table.add_column("Risk", style="white", width=25)
@@ -165,39 +361,39 @@ def display_results(message: str, results: dict):
                     Text(impact.upper(), style=get_severity_style(impact))
                 )
 
-            console.print(risk_table)
+            out.append(risk_table)
 
         # Red Flags
         red_flags = risk.get("red_flags", [])
         if red_flags:
-            console.print()
-            console.print("[bold red]Red Flags[/bold red]")
+            out.append("")
+            out.append("[bold red]Red Flags[/bold red]")
 
             for flag in red_flags[:5]:
                 severity = flag.get("severity", "medium")
-                console.print(
+                out.append(
                     f"  [{get_severity_style(severity)}]●[/{get_severity_style(severity)}] "
                     f"[italic]\"{flag.get('phrase', '')}\"[/italic]"
                 )
-                console.print(f"    {flag.get('why_problematic', '')}")
-                console.print(f"    [dim]Category: {flag.get('category', '')}[/dim]")
+                out.append(f"    {flag.get('why_problematic', '')}")
+                out.append(f"    [dim]Category: {flag.get('category', '')}[/dim]")
 
         # Ambiguities
         ambiguities = risk.get("ambiguities", [])
         if ambiguities:
-            console.print()
-            console.print("[bold yellow]Ambiguities[/bold yellow]")
+            out.append("")
+            out.append("[bold yellow]Ambiguities[/bold yellow]")
             for amb in ambiguities[:3]:
-                console.print(f"  - {amb}")
+                out.append(f"  - {amb}")
 
     # Rewrite Suggestions
     rewrite = results.get("rewrite", {})
     if rewrite and "error" not in rewrite and rewrite.get("needs_rewrite"):
-        console.print()
-        console.print("[bold green]Suggested Rewrites[/bold green]")
+        out.append("")
+        out.append("[bold green]Suggested Rewrites[/bold green]")
 
         for rw in rewrite.get("rewrites", [])[:2]:
-            console.print(Panel(
+            out.append(Panel(
                 f"[green]{rw.get('rewritten_message', '')}[/green]\n\n"
                 f"[dim]Tone: {rw.get('tone_shift', '')}[/dim]",
                 title=f"[bold]{rw.get('version', 'Alternative').title()} Version[/bold]",
@@ -207,18 +403,110 @@ def display_results(message: str, results: dict):
         # Specific fixes
         fixes = rewrite.get("specific_fixes", [])
         if fixes:
-            console.print()
-            console.print("[bold]Quick Fixes[/bold]")
+            out.append("")
+            out.append("[bold]Quick Fixes[/bold]")
             for fix in fixes[:3]:
-                console.print(f"  [red]- \"{fix.get('original_phrase', '')}\"[/red]")
-                console.print(f"  [green]+ \"{fix.get('suggested_phrase', '')}\"[/green]")
-                console.print(f"    [dim]{fix.get('reason', '')}[/dim]")
-                console.print()
+                out.append(f"  [red]- \"{fix.get('original_phrase', '')}\"[/red]")
+                out.append(f"  [green]+ \"{fix.get('suggested_phrase', '')}\"[/green]")
+                out.append(f"    [dim]{fix.get('reason', '')}[/dim]")
+                out.append("")
 
         # General advice
         advice = rewrite.get("general_advice")
         if advice:
-            console.print(f"[dim]Advice: {advice}[/dim]")
+            out.append(f"[dim]Advice: {advice}[/dim]")
+
+    console.print(Group(*out))
+
+
+def dedupe_messages(messages: list[str]) -> tuple:
+    """
+    Collapse repeated messages so each distinct one is analyzed once.
+
+    Returns (unique_messages, order), where order[i] is the index in
+    unique_messages of the i-th input message.
+    """
+    index_by_hash = {}
+    unique = []
+    order = []
+    for msg in messages:
+        digest = hashlib.blake2b(msg.encode(), digest_size=16).digest()
+        if digest not in index_by_hash:
+            index_by_hash[digest] = len(unique)
+            unique.append(msg)
+        order.append(index_by_hash[digest])
+    return unique, order
+
+
+def render_results(message: str, results, width: int, color_system: str = None) -> str:
+    """Render one message's results (or its exception) to a string of terminal output."""
+    from rich.console import Console
+
+    buffer = io.StringIO()
+    console = Console(file=buffer, width=width, color_system=color_system, force_terminal=color_system is not None)
+    if isinstance(results, Exception):
+        console.print(f"[red]Analysis failed: {results}[/red]")
+    else:
+        display_results(message, results, console=console)
+    return buffer.getvalue()
+
+
+def _init_worker():
+    """Give each worker process its own API client instead of the parent's forked one."""
+    from agents.base_agent import reset_client
+    reset_client()
+
+
+def _process_shard(messages: list[str], options: dict) -> list[str]:
+    """Analyze and render one shard of a file inside a worker process."""
+    from agents import response_cache
+
+    response_cache.configure(enabled=options["use_cache"], ttl=options["cache_ttl"])
+    guard = CommunicationGuard()
+    all_results = run_async(guard.analyze_many(
+        messages,
+        include_rewrite=options["include_rewrite"],
+        concurrency=options["concurrency"],
+        force_full=options["force_full"]
+    ))
+    return [
+        render_results(msg, results, options["width"], options["color_system"])
+        for msg, results in zip(messages, all_results)
+    ]
+
+
+def analyze_in_processes(
+    messages: list[str],
+    workers: int,
+    options: dict,
+    on_progress: Callable[[int], None] = None
+) -> list[str]:
+    """
+    Analyze messages across worker processes and return their rendered output.
+
+    Messages are split into one contiguous shard per worker, so rendering and
+    parsing run on several cores instead of serializing after the network
+    work. `options["concurrency"]` is the total across workers, so there are
+    never more shards than it allows. Output is returned in input order.
+    """
+    workers = min(workers, len(messages), options["concurrency"])
+    shard_size = math.ceil(len(messages) / workers)
+    shards = [messages[i:i + shard_size] for i in range(0, len(messages), shard_size)]
+    shard_options = dict(options, concurrency=max(1, options["concurrency"] // len(shards)))
+
+    rendered = [None] * len(shards)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker) as executor:
+        futures = {executor.submit(_process_shard, shard, shard_options): i for i, shard in enumerate(shards)}
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            try:
+                rendered[i] = future.result()
+            except Exception as e:
+                rendered[i] = [render_results("", e, options["width"], options["color_system"])] * len(shards[i])
+            if on_progress:
+                on_progress(len(shards[i]))
+
+    return [text for shard in rendered for text in shard]
 
 
 @click.command()
@@ -226,7 +514,17 @@ def display_results(message: str, results: dict):
 @click.option("--file", "-f", type=click.Path(exists=True), help="Read message from file")
 @click.option("--interactive", "-i", is_flag=True, help="Interactive mode")
 @click.option("--no-rewrite", is_flag=True, help="Skip rewrite suggestions")
-def main(message: str, file: str, interactive: bool, no_rewrite: bool):
+@click.option("--concurrency", "-c", type=click.IntRange(min=1), default=4, show_default=True,
+              help="Max messages analyzed at once in file mode")
+@click.option("--workers", "-w", type=click.IntRange(min=0), default=1, show_default=True,
+              help="Worker processes for file mode (0 = one per CPU)")
+@click.option("--force-full", is_flag=True, help="Run every agent, even for clearly benign messages")
+@click.option("--no-cache", is_flag=True, help="Always call the API instead of reusing cached responses")
+@click.option("--cache-ttl", type=click.FloatRange(min=0), default=None,
+              help="Ignore cached responses older than this many seconds")
+@click.option("--verbose", "-v", is_flag=True, help="Log which messages take the benign fast path")
+def main(message: str, file: str, interactive: bool, no_rewrite: bool, concurrency: int,
+         workers: int, force_full: bool, no_cache: bool, cache_ttl: float, verbose: bool):
     """
     Communication Intent & Risk Guard
 
@@ -236,16 +534,27 @@ def main(message: str, file: str, interactive: bool, no_rewrite: bool):
     - Misinterpretation risks
     - Suggested rewrites
     """
+    from rich.panel import Panel
+    from rich.progress import Progress
+
+    from agents import response_cache
 
+    if verbose:
+        logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+
+    console = get_console()
     console.print(Panel(
         "[bold]Communication Intent & Risk Guard[/bold]\n"
         "[dim]Multi-agent pre-send analysis system[/dim]",
         border_style="blue"
     ))
 
-    guard = CommunicationGuard()
+    response_cache.configure(enabled=not no_cache, ttl=cache_ttl)
 
+    # Built per mode rather than up front: the sharded file mode must not open
+    # an API connection in the parent before forking its workers.
     if interactive:
+        guard = CommunicationGuard()
         console.print("[dim]Enter messages to analyze (Ctrl+C to exit):[/dim]\n")
 
         while True:
@@ -260,8 +569,15 @@ def main(message: str, file: str, interactive: bool, no_rewrite: bool):
                     continue
 
                 console.print()
-                with console.status("[bold blue]Running analysis pipeline...[/bold blue]"):
-                    results = guard.analyze(user_message, include_rewrite=not no_rewrite)
+                with console.status("[bold blue]Running analysis pipeline...[/bold blue]") as status:
+                    results = run_async(guard.analyze(
+                        user_message,
+                        include_rewrite=not no_rewrite,
+                        force_full=force_full,
+                        on_token=lambda n: status.update(
+                            f"[bold blue]Generating suggestions... ({n} chunks received)[/bold blue]"
+                        )
+                    ))
 
                 display_results(user_message, results)
                 console.print("\n" + "─" * 60 + "\n")
@@ -277,21 +593,62 @@ def main(message: str, file: str, interactive: bool, no_rewrite: bool):
         # Handle multiple messages separated by ---
         messages = [m.strip() for m in content.split("---") if m.strip()]
 
+        # Templated files often repeat messages; analyze each distinct one once
+        unique, order = dedupe_messages(messages)
+        duplicates = len(messages) - len(unique)
+        if duplicates:
+            console.print(f"[dim]Reusing results for {duplicates} duplicate message{'s' if duplicates > 1 else ''}[/dim]")
+
+        workers = workers or os.cpu_count() or 1
+        rendered = None
+
+        with Progress(console=console, transient=True) as progress:
+            task = progress.add_task("[bold blue]Running analysis pipeline...[/bold blue]", total=len(unique))
+            if workers > 1 and len(unique) > 1:
+                unique_rendered = analyze_in_processes(unique, workers, {
+                    "include_rewrite": not no_rewrite,
+                    "concurrency": concurrency,
+                    "force_full": force_full,
+                    "use_cache": not no_cache,
+                    "cache_ttl": cache_ttl,
+                    "width": console.width,
+                    "color_system": console.color_system
+                }, on_progress=lambda n: progress.advance(task, n))
+                rendered = [unique_rendered[j] for j in order]
+            else:
+                guard = CommunicationGuard()
+                unique_results = run_async(guard.analyze_many(
+                    unique,
+                    include_rewrite=not no_rewrite,
+                    concurrency=concurrency,
+                    force_full=force_full,
+                    on_progress=lambda n: progress.advance(task, n)
+                ))
+                all_results = [unique_results[j] for j in order]
+
         for i, msg in enumerate(messages, 1):
             if len(messages) > 1:
                 console.print(f"\n[bold]Message {i}/{len(messages)}[/bold]")
 
-            with console.status("[bold blue]Running analysis pipeline...[/bold blue]"):
-                results = guard.analyze(msg, include_rewrite=not no_rewrite)
-
-            display_results(msg, results)
+            if rendered is not None:
+                console.file.write(rendered[i - 1])
+            elif isinstance(all_results[i - 1], Exception):
+                console.print(f"[red]Analysis failed: {all_results[i - 1]}[/red]")
+            else:
+                display_results(msg, all_results[i - 1])
 
             if i < len(messages):
                 console.print("\n" + "═" * 60 + "\n")
 
     elif message:
-        with console.status("[bold blue]Running analysis pipeline...[/bold blue]"):
-            results = guard.analyze(message, include_rewrite=not no_rewrite)
+        guard = CommunicationGuard()
+        with console.status("[bold blue]Running analysis pipeline...[/bold blue]") as status:
+            results = run_async(guard.analyze(
+                message,
+                include_rewrite=not no_rewrite,
+                force_full=force_full,
+                on_token=lambda n: status.update(f"[bold blue]Generating suggestions... ({n} chunks received)[/bold blue]")
+            ))
 
         display_results(message, results)
 
@@ -2,8 +2,18 @@
 Communication Intent & Risk Guard - Streamlit Web Interface
 """
 
+import functools
+import html
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Callable
+
 import streamlit as st
-from agents import IntentAgent, EmotionAgent, RiskAgent, RewriteAgent
 
 
 st.set_page_config(
@@ -12,29 +22,131 @@ st.set_page_config(
     layout="wide"
 )
 
-# Custom CSS
-st.markdown("""
-<style>
-    .risk-score-low { color: #28a745; font-size: 2em; font-weight: bold; }
-    .risk-score-medium { color: #ffc107; font-size: 2em; font-weight: bold; }
-    .risk-score-high { color: #dc3545; font-size: 2em; font-weight: bold; }
-    .red-flag { background-color: #ffe6e6; padding: 10px; border-radius: 5px; margin: 5px 0; }
-    .suggestion { background-color: #e6ffe6; padding: 15px; border-radius: 5px; margin: 10px 0; }
-    .leakage-warning { background-color: #fff3e6; padding: 10px; border-radius: 5px; }
-</style>
-""", unsafe_allow_html=True)
+EXAMPLE_MESSAGES = {
+    "Select an example...": "",
+    "Passive-aggressive": "Fine. I guess I'll just do it myself since nobody else seems to care.",
+    "Accusatory": "I thought you said you'd handle this. Whatever, I'll figure it out.",
+    "Sarcastic": "Must be nice to have so much free time. Some of us are actually busy.",
+    "Professional (safe)": "Would it be possible to reschedule our meeting to Thursday? I have a conflict that just came up.",
+}
+
+# Custom CSS, kept compact since it is re-sent on every rerun
+CSS = (
+    "<style>"
+    ".risk-score-low{color:#28a745;font-size:2em;font-weight:bold}"
+    ".risk-score-medium{color:#ffc107;font-size:2em;font-weight:bold}"
+    ".risk-score-high{color:#dc3545;font-size:2em;font-weight:bold}"
+    ".red-flag{background-color:#ffe6e6;padding:10px;border-radius:5px;margin:5px 0}"
+    ".suggestion{background-color:#e6ffe6;padding:15px;border-radius:5px;margin:10px 0}"
+    ".leakage-warning{background-color:#fff3e6;padding:10px;border-radius:5px}"
+    "</style>"
+)
+
+
+def inject_css():
+    """
+    Emit the stylesheet.
+
+    This has to run on every rerun: Streamlit removes any element a run does
+    not re-emit, so a once-per-session guard would drop the styles after the
+    first interaction.
+    """
+    st.markdown(CSS, unsafe_allow_html=True)
+
+
+AGENT_POOL_SIZE = 4
+AGENT_MAX_IDLE_SECONDS = 10 * 60
+
+
+class AgentPool:
+    """
+    Pool of interchangeable instances of one agent class.
+
+    Each concurrent analysis checks out its own instance, so sessions never
+    share an agent mid-call. Instances are created on demand when the pool
+    is empty, and at most `size` are kept; ones idle for longer than
+    `max_idle_time` seconds are dropped by evict_idle().
+    """
+
+    def __init__(self, factory: Callable, size: int = AGENT_POOL_SIZE,
+                 max_idle_time: float = AGENT_MAX_IDLE_SECONDS):
+        self.factory = factory
+        self.max_idle_time = max_idle_time
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def acquire(self):
+        """Check out an agent for the duration of the with block."""
+        try:
+            agent, _ = self._idle.get_nowait()
+        except queue.Empty:
+            agent = self.factory()
+        try:
+            yield agent
+        finally:
+            try:
+                self._idle.put_nowait((agent, time.monotonic()))
+            except queue.Full:
+                pass
+
+    def evict_idle(self):
+        """Drop instances that have sat unused for longer than max_idle_time."""
+        keep = []
+        cutoff = time.monotonic() - self.max_idle_time
+        while True:
+            try:
+                agent, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if last_used >= cutoff:
+                keep.append((agent, last_used))
+
+        # LIFO order: put the oldest back first so the freshest is handed out next
+        for entry in sorted(keep, key=lambda entry: entry[1]):
+            try:
+                self._idle.put_nowait(entry)
+            except queue.Full:
+                break
 
 
 @st.cache_resource
-def load_agents():
-    """Load agents once and cache them."""
-    return {
-        "intent": IntentAgent(),
-        "emotion": EmotionAgent(),
-        "risk": RiskAgent(),
-        "rewrite": RewriteAgent()
+def load_agents() -> dict:
+    """
+    Create one agent pool per agent class, once per process.
+
+    The agents (and the Groq SDK behind them) are imported here rather than
+    at module level, so a cold start paints the page before paying for them.
+    """
+    from agents import IntentAgent, EmotionAgent, RiskAgent, RewriteAgent, MetaAgent
+
+    pools = {
+        "intent": AgentPool(IntentAgent),
+        "emotion": AgentPool(EmotionAgent),
+        "risk": AgentPool(RiskAgent),
+        "rewrite": AgentPool(RewriteAgent),
+        "meta": AgentPool(MetaAgent)
     }
 
+    # Seed one instance each so the first analysis doesn't pay for construction
+    for pool in pools.values():
+        with pool.acquire():
+            pass
+
+    def clean():
+        while True:
+            time.sleep(AGENT_MAX_IDLE_SECONDS)
+            for pool in pools.values():
+                pool.evict_idle()
+
+    threading.Thread(target=clean, name="agent-pool-cleaner", daemon=True).start()
+    return pools
+
+
+@st.cache_resource
+def load_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by all sessions for running independent agents in parallel."""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="agent")
+
 
 def get_risk_color(score: int) -> str:
     """Return color class based on risk score."""
@@ -45,49 +157,442 @@ def get_risk_color(score: int) -> str:
     return "high"
 
 
-def run_analysis(message: str, agents: dict) -> dict:
-    """Run the full analysis pipeline."""
-    results = {}
+class _StageError(Exception):
+    """Carries an agent's error result out through st.cache_data, which never stores exceptions."""
 
-    # Intent Analysis
-    results["intent"] = agents["intent"].analyze(message)
+    def __init__(self, result: dict):
+        super().__init__(result.get("error"))
+        self.result = result
 
-    # Emotion Analysis
-    results["emotion"] = agents["emotion"].analyze(message)
 
-    # Risk Assessment
-    results["risk"] = agents["risk"].analyze(message, context={
-        "intent": results["intent"],
-        "emotion": results["emotion"]
+def has_error(result) -> bool:
+    """Whether an agent result is an error dict rather than an analysis."""
+    return isinstance(result, dict) and "error" in result
+
+
+def cached_stage(fn):
+    """
+    Cache a stage function's results for an hour, except error results.
+
+    Errors are raised through the st.cache_data layer and turned back into
+    the error dict outside it, so a failed stage is tried again on the next
+    run instead of being served from the cache.
+    """
+    @functools.wraps(fn)
+    def checked(*args, **kwargs):
+        result = fn(*args, **kwargs)
+        if has_error(result):
+            raise _StageError(result)
+        return result
+
+    cached = st.cache_data(ttl=60 * 60, max_entries=1024, show_spinner=False)(checked)
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        try:
+            return cached(*args, **kwargs)
+        except _StageError as e:
+            return e.result
+
+    return run
+
+
+# Each agent is cached on its own inputs, so an edit that leaves one stage's
+# inputs unchanged still reuses that stage's result.
+@cached_stage
+def _intent(message: str) -> dict:
+    with load_agents()["intent"].acquire() as agent:
+        return agent.analyze(message)
+
+
+@cached_stage
+def _emotion(message: str) -> dict:
+    with load_agents()["emotion"].acquire() as agent:
+        return agent.analyze(message)
+
+
+@cached_stage
+def _risk(message: str, intent: dict, emotion: dict) -> dict:
+    with load_agents()["risk"].acquire() as agent:
+        return agent.analyze(message, context={"intent": intent, "emotion": emotion})
+
+
+@cached_stage
+def _rewrite(message: str, intent_primary: str, emotion_primary: str, risk_score, _context: dict) -> dict:
+    # Keyed on the headline values only; the leading underscore keeps the
+    # full context dict out of the cache key to raise the hit rate.
+    with load_agents()["rewrite"].acquire() as agent:
+        return agent.analyze(message, context=_context)
+
+
+@cached_stage
+def _meta(message: str) -> dict:
+    with load_agents()["meta"].acquire() as agent:
+        return agent.analyze(message)
+
+
+# Risk scores below this skip the rewrite agent when nothing concrete was flagged
+REWRITE_SKIP_MAX_SCORE = 7
+
+
+def is_trivial_safe(risk: dict) -> bool:
+    """
+    Whether a risk result leaves the rewrite agent nothing to fix.
+
+    Below REWRITE_SKIP_MAX_SCORE, a result with no concrete red flags or
+    misinterpretation risks would just get needs_rewrite=False back, so
+    that is answered locally instead.
+    """
+    return (
+        not risk.get("red_flags")
+        and not risk.get("misinterpretation_risks")
+        and risk.get("overall_risk_score", 0) < REWRITE_SKIP_MAX_SCORE
+    )
+
+
+# Finished analyses are kept on disk for a week, so restarts start warm
+RESULTS_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Near-duplicate messages ("Fine, I'll do it myself" vs "Fine. I'll do it
+# myself.") reuse a previous analysis when their embeddings are this similar.
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_SIZE = 256
+
+
+@st.cache_resource(show_spinner=False)
+def load_results_cache():
+    """Open the sqlite-backed store of finished analyses, shared by all sessions."""
+    from agents._cache import DEFAULT_CACHE_PATH, ResponseCache, make_key
+
+    cache = ResponseCache(DEFAULT_CACHE_PATH.with_name("results.sqlite"), ttl=RESULTS_CACHE_TTL)
+    return cache, make_key
+
+
+def _persisted(key: tuple, run: Callable[[], dict]) -> dict:
+    """
+    Read-through/write-through wrapper around a fresh analysis.
+
+    Results with an error from any stage aren't stored here, and
+    cached_stage and the agents' response cache don't keep errors either,
+    so a bad response is retried next time instead of being served for a week.
+    """
+    cache, make_key = load_results_cache()
+    key = make_key("results", *key)
+
+    stored = cache.get(key)
+    if stored is not None:
+        return json.loads(stored)
+
+    results = run()
+    if not any(has_error(r) for r in results.values()):
+        cache.set(key, json.dumps(results, default=str))
+    return results
+
+
+@st.cache_resource(show_spinner=False)
+def load_embedder():
+    """Load the sentence embedding model once; None if sentence-transformers isn't installed."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    return SentenceTransformer("all-MiniLM-L6-v2")
+
+
+def _semantic_lookup(embedding, mode: tuple) -> dict:
+    """
+    Return the stored result for the most similar previous message, if close enough.
+
+    Only entries analyzed in the same (combined, speculative) mode count, so
+    a speculative rewrite isn't served after speculation is turned off.
+    """
+    cache = st.session_state.get("sem_cache")
+    if embedding is None or not cache or not cache["results"]:
+        return None
+
+    import numpy as np
+
+    same_mode = np.array([entry_mode == mode for entry_mode in cache["modes"]])
+    similarities = np.where(same_mode, cache["emb"] @ embedding, -1.0)
+    best = int(similarities.argmax())
+    if similarities[best] >= SEMANTIC_CACHE_THRESHOLD:
+        return cache["results"][best]
+    return None
+
+
+def _semantic_store(message: str, embedding, results: dict, mode: tuple):
+    """Remember a result for this session, evicting the oldest past SEMANTIC_CACHE_SIZE."""
+    # Results with a failed stage aren't reused, so the next attempt retries it
+    if embedding is None or any(has_error(r) for r in results.values()):
+        return
+
+    import numpy as np
+
+    cache = st.session_state.setdefault("sem_cache", {
+        "emb": np.empty((0, embedding.shape[0])),
+        "results": [],
+        "msgs": [],
+        "modes": []
     })
+    cache["emb"] = np.vstack([cache["emb"], embedding])[-SEMANTIC_CACHE_SIZE:]
+    cache["results"] = (cache["results"] + [results])[-SEMANTIC_CACHE_SIZE:]
+    cache["msgs"] = (cache["msgs"] + [message])[-SEMANTIC_CACHE_SIZE:]
+    cache["modes"] = (cache["modes"] + [mode])[-SEMANTIC_CACHE_SIZE:]
+
+
+def normalize_message(message: str) -> str:
+    """
+    Canonicalize a message for caching: trim it and collapse runs of whitespace.
+
+    Case and punctuation are left alone on purpose. "Fine." and "FINE!!"
+    read very differently, and the emotion and risk agents rely on those
+    cues for sarcasm and anger, so folding them would serve wrong results.
+    """
+    return re.sub(r"\s+", " ", message.strip())
+
+
+def run_analysis(message: str, speculative: bool = False, combined: bool = False,
+                 on_stage: Callable[[str, dict], None] = None) -> dict:
+    """
+    Run the analysis, serving near-duplicates of earlier messages from the semantic cache.
+
+    The message is normalized first, so whitespace-only edits hit every
+    cache layer, including the on-disk store of finished analyses. With
+    combined=True all four analyses are requested in one MetaAgent call,
+    falling back to the per-agent pipeline if its response doesn't match
+    the schema. on_stage(name, result) is called on the script thread as
+    each stage of a fresh pipeline run finishes, so the UI can render it
+    right away.
+    """
+    message = normalize_message(message)
+    embedder = load_embedder()
+    embedding = embedder.encode(message, normalize_embeddings=True) if embedder else None
+
+    mode = (combined, speculative)
+    results = _semantic_lookup(embedding, mode)
+    if results is None:
+        results = analyze_shared(message, speculative=speculative, combined=combined, on_stage=on_stage)
+        _semantic_store(message, embedding, results, mode)
+    return results
+
+
+def analyze_shared(message: str, speculative: bool = False, combined: bool = False,
+                   on_stage: Callable[[str, dict], None] = None) -> dict:
+    """
+    Analyze a normalized message through the layers shared by all sessions.
+
+    Concurrent requests for the same message are collapsed (see
+    _single_flight) and finished results are read from and written to the
+    on-disk store. Touches no session state, so background threads can use it.
+    """
+    def fresh():
+        return (combined and _run_combined(message, on_stage=on_stage)) or \
+            _run_pipeline(message, speculative=speculative, on_stage=on_stage)
+
+    # Speculative rewrites are built without the risk result, so they are
+    # kept apart from ones that had it
+    key = (message, combined, speculative)
+    return _single_flight(key, lambda: _persisted(key, fresh))
+
+
+@st.cache_resource
+def load_inflight() -> tuple:
+    """
+    Registry of analyses running in this process, shared by all sessions.
+
+    Keyed by (normalized message, combined, speculative). It has to live in
+    cache_resource: Streamlit re-executes this file as a fresh module on
+    every rerun, so module-level state would never be seen by a second run.
+    """
+    inflight: dict[tuple, threading.Event] = {}
+    return inflight, threading.Lock()
+
+
+def _single_flight(key: tuple, run: Callable[[], dict]) -> dict:
+    """
+    Call run(), unless a run for the same key is already in progress.
+
+    A double-clicked Analyze button or a second session asking about the
+    same message waits for the first run to finish and then calls run()
+    itself, which is served from the agent caches the first run filled.
+    Only the first caller pays for the LLM calls.
+    """
+    inflight, lock = load_inflight()
+    with lock:
+        event = inflight.get(key)
+        leader = event is None
+        if leader:
+            event = inflight[key] = threading.Event()
+
+    if not leader:
+        event.wait()
+        return run()
+
+    try:
+        return run()
+    finally:
+        with lock:
+            del inflight[key]
+        event.set()
+
+
+def _run_combined(message: str, on_stage: Callable[[str, dict], None] = None) -> dict:
+    """
+    Run every analysis in a single MetaAgent call.
+
+    The combined response always carries a rewrite section; it is dropped or
+    replaced under the same rules the pipeline uses to decide whether to run
+    the rewrite agent at all. Returns None if the response failed schema
+    validation.
+    """
+    combined = _meta(message)
+    if "error" in combined:
+        return None
+
+    results = {name: combined[name] for name in STAGES}
+    risk = results["risk"]
+    if risk.get("overall_risk_score", 0) < 4:
+        del results["rewrite"]
+    elif is_trivial_safe(risk):
+        results["rewrite"] = {"needs_rewrite": False}
+
+    if on_stage:
+        for name in STAGES:
+            if name in results:
+                on_stage(name, results[name])
+    return results
+
+
+def _run_pipeline(message: str, speculative: bool = False, on_stage: Callable[[str, dict], None] = None) -> dict:
+    """
+    Run the full analysis pipeline, reusing each agent's cached results.
+
+    With speculative=True the rewrite starts alongside the risk assessment,
+    using only the intent and emotion context, and is discarded if the
+    message turns out to be low risk. That hides the rewrite's latency on
+    risky messages at the cost of wasted tokens on safe ones. on_stage is
+    called with each stage's result as soon as it is available.
+    """
+    results = {}
+
+    # Intent + Emotion Analysis (independent, so run in parallel)
+    executor = load_executor()
+    futures = {executor.submit(_intent, message): "intent", executor.submit(_emotion, message): "emotion"}
+    for future in as_completed(futures):
+        results[futures[future]] = future.result()
+        if on_stage:
+            on_stage(futures[future], results[futures[future]])
+
+    rewrite_future = None
+    if speculative:
+        rewrite_future = executor.submit(
+            _rewrite,
+            message,
+            results["intent"].get("primary_intent"),
+            results["emotion"].get("primary_emotion"),
+            None,
+            _context=dict(results)
+        )
+
+    # Risk Assessment
+    results["risk"] = _risk(message, results["intent"], results["emotion"])
+    if on_stage:
+        on_stage("risk", results["risk"])
 
     # Rewrite Suggestions (only for risky messages)
-    risk_score = results["risk"].get("overall_risk_score", 0)
-    if risk_score >= 4:
-        results["rewrite"] = agents["rewrite"].analyze(message, context=results)
+    risk = results["risk"]
+    risk_score = risk.get("overall_risk_score", 0)
+
+    trivial_safe = is_trivial_safe(risk)
+
+    if risk_score >= 4 and trivial_safe:
+        results["rewrite"] = {"needs_rewrite": False}
+        if rewrite_future:
+            rewrite_future.cancel()
+    elif risk_score >= 4:
+        if rewrite_future:
+            results["rewrite"] = rewrite_future.result()
+        else:
+            results["rewrite"] = _rewrite(
+                message,
+                results["intent"].get("primary_intent"),
+                results["emotion"].get("primary_emotion"),
+                risk_score,
+                _context=results
+            )
+    elif rewrite_future:
+        rewrite_future.cancel()
+
+    if on_stage and "rewrite" in results:
+        on_stage("rewrite", results["rewrite"])
 
     return results
 
 
+@st.cache_resource
+def prewarm_examples():
+    """
+    Analyze the sidebar examples in the background, once per process.
+
+    Goes through the same shared layers as a user's analysis, so the result
+    is persisted and a user picking an example mid-prewarm waits for it
+    instead of repeating its calls. Picking an example then returns instantly,
+    without holding up the first page render.
+    """
+    def warm():
+        for example in EXAMPLE_MESSAGES.values():
+            if example:
+                analyze_shared(normalize_message(example))
+
+    threading.Thread(target=warm, daemon=True).start()
+
+
+def html_block(css_class: str, blocks: list[str]) -> str:
+    """
+    Wrap markdown blocks in a styled div, as one string for a single st.markdown call.
+
+    Blank lines around the content let the markdown inside the div render.
+    The blocks are sent with unsafe_allow_html, so any agent output in them
+    must go through escape_html() first.
+    """
+    return f'<div class="{css_class}">\n\n' + "\n\n".join(blocks) + "\n\n</div>"
+
+
+def escape_html(value) -> str:
+    """Escape agent output (which often quotes the user's message) for use inside raw HTML."""
+    return html.escape(str(value))
+
+
+def table_cell(text: str) -> str:
+    """Escape text for use inside a markdown table cell."""
+    return str(text).replace("|", "\\|").replace("\n", " ")
+
+
+def summary_table(*columns: tuple) -> str:
+    """Render (label, value) pairs as a one-row markdown table, one column per pair."""
+    header = "| " + " | ".join(table_cell(label) for label, _ in columns) + " |"
+    divider = "|" + "---|" * len(columns)
+    row = "| " + " | ".join(f"**{table_cell(value)}**" for _, value in columns) + " |"
+    return "\n".join((header, divider, row))
+
+
 def display_intent(intent: dict):
     """Display intent analysis results."""
     if "error" in intent:
         st.error(f"Intent analysis error: {intent['error']}")
         return
 
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.metric("Primary Intent", intent.get("primary_intent", "Unknown"))
-
-    with col2:
-        st.metric("Confidence", intent.get("confidence", "Unknown").upper())
+    blocks = [summary_table(
+        ("Primary Intent", intent.get("primary_intent", "Unknown")),
+        ("Confidence", intent.get("confidence", "Unknown").upper())
+    )]
 
     secondary = intent.get("secondary_intents", [])
     if secondary:
-        st.write(f"**Secondary intents:** {', '.join(secondary)}")
+        blocks.append(f"**Secondary intents:** {', '.join(secondary)}")
 
-    st.write(f"*{intent.get('explanation', '')}*")
+    blocks.append(f"*{intent.get('explanation', '')}*")
+    st.markdown("\n\n".join(blocks))
 
     if intent.get("hidden_agenda"):
         st.warning(f"⚠️ **Hidden Agenda Detected:** {intent['hidden_agenda']}")
@@ -99,41 +604,37 @@ def display_emotion(emotion: dict):
         st.error(f"Emotion analysis error: {emotion['error']}")
         return
 
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.metric("Primary Emotion", emotion.get("primary_emotion", "Unknown"))
-
-    with col2:
-        st.metric("Intensity", emotion.get("intensity", "Unknown").upper())
+    blocks = [summary_table(
+        ("Primary Emotion", emotion.get("primary_emotion", "Unknown")),
+        ("Intensity", emotion.get("intensity", "Unknown").upper())
+    )]
 
     secondary = emotion.get("secondary_emotions", [])
     if secondary:
-        st.write(f"**Secondary emotions:** {', '.join(secondary)}")
+        blocks.append(f"**Secondary emotions:** {', '.join(secondary)}")
 
     tone = emotion.get("tone_descriptors", [])
     if tone:
-        st.write(f"**Tone:** {', '.join(tone)}")
+        blocks.append(f"**Tone:** {', '.join(tone)}")
+
+    st.markdown("\n\n".join(blocks))
 
     # Emotional Leakage
     leakage = emotion.get("emotional_leakage", {})
     if leakage.get("detected"):
         st.markdown("---")
-        st.markdown('<div class="leakage-warning">', unsafe_allow_html=True)
-        st.subheader("⚠️ Emotional Leakage Detected")
+        blocks = ["### ⚠️ Emotional Leakage Detected"]
 
         leaked = leakage.get("leaked_emotions", [])
         if leaked:
-            st.write(f"**Leaked emotions:** {', '.join(leaked)}")
+            blocks.append(f"**Leaked emotions:** {escape_html(', '.join(map(str, leaked)))}")
 
         indicators = leakage.get("indicators", [])
         if indicators:
-            st.write("**Indicators:**")
-            for ind in indicators:
-                st.write(f'- *"{ind}"*')
+            blocks.append("**Indicators:**\n" + "\n".join(f'- *"{escape_html(ind)}"*' for ind in indicators))
 
-        st.write(leakage.get("explanation", ""))
-        st.markdown('</div>', unsafe_allow_html=True)
+        blocks.append(escape_html(leakage.get("explanation", "")))
+        st.markdown(html_block("leakage-warning", blocks), unsafe_allow_html=True)
 
 
 def display_risk(risk: dict):
@@ -147,7 +648,7 @@ def display_risk(risk: dict):
     color = get_risk_color(score)
 
     st.markdown(
-        f'<p class="risk-score-{color}">{score}/10 ({level.upper()})</p>',
+        f'<p class="risk-score-{color}">{escape_html(score)}/10 ({escape_html(str(level).upper())})</p>',
         unsafe_allow_html=True
     )
 
@@ -158,33 +659,34 @@ def display_risk(risk: dict):
 
         for r in risks_list:
             with st.expander(f"⚠️ {r.get('risk', 'Risk')}", expanded=True):
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write(f"**Probability:** {r.get('probability', '?').upper()}")
-                with col2:
-                    st.write(f"**Impact:** {r.get('impact', '?').upper()}")
-
-                st.write(f"**Problematic phrase:** *\"{r.get('problematic_phrase', '')}\"*")
-                st.write(r.get("explanation", ""))
+                st.markdown(
+                    summary_table(
+                        ("Probability", r.get("probability", "?").upper()),
+                        ("Impact", r.get("impact", "?").upper())
+                    ) + "\n\n"
+                    f"**Problematic phrase:** *\"{r.get('problematic_phrase', '')}\"*\n\n"
+                    f"{r.get('explanation', '')}"
+                )
 
     # Red Flags
     red_flags = risk.get("red_flags", [])
     if red_flags:
         st.subheader("🚩 Red Flags")
 
-        for flag in red_flags:
-            st.markdown('<div class="red-flag">', unsafe_allow_html=True)
-            st.write(f'**"{flag.get("phrase", "")}"**')
-            st.write(f"*{flag.get('why_problematic', '')}*")
-            st.caption(f"Category: {flag.get('category', '')}")
-            st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown("\n\n".join(
+            html_block("red-flag", [
+                f'**"{escape_html(flag.get("phrase", ""))}"**',
+                f"*{escape_html(flag.get('why_problematic', ''))}*",
+                f"<small>Category: {escape_html(flag.get('category', ''))}</small>"
+            ])
+            for flag in red_flags
+        ), unsafe_allow_html=True)
 
     # Ambiguities
     ambiguities = risk.get("ambiguities", [])
     if ambiguities:
         st.subheader("❓ Ambiguities")
-        for amb in ambiguities:
-            st.write(f"- {amb}")
+        st.markdown("\n".join(f"- {amb}" for amb in ambiguities))
 
 
 def display_rewrite(rewrite: dict):
@@ -200,32 +702,34 @@ def display_rewrite(rewrite: dict):
     # Rewrite versions
     rewrites = rewrite.get("rewrites", [])
     if rewrites:
+        versions = []
         for rw in rewrites:
-            st.markdown('<div class="suggestion">', unsafe_allow_html=True)
-            st.subheader(f"✨ {rw.get('version', 'Alternative').title()} Version")
-            st.markdown(f"> {rw.get('rewritten_message', '')}")
+            blocks = [
+                f"### ✨ {escape_html(str(rw.get('version', 'Alternative')).title())} Version",
+                f"> {escape_html(rw.get('rewritten_message', ''))}"
+            ]
 
             changes = rw.get("changes_made", [])
             if changes:
-                st.write("**Changes:**")
-                for change in changes:
-                    st.write(f"- {change}")
+                blocks.append("**Changes:**\n" + "\n".join(f"- {escape_html(change)}" for change in changes))
+
+            blocks.append(f"<small>Tone shift: {escape_html(rw.get('tone_shift', ''))}</small>")
+            versions.append(html_block("suggestion", blocks))
 
-            st.caption(f"Tone shift: {rw.get('tone_shift', '')}")
-            st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown("\n\n".join(versions), unsafe_allow_html=True)
 
     # Specific fixes
     fixes = rewrite.get("specific_fixes", [])
     if fixes:
         st.subheader("Quick Fixes")
 
-        for fix in fixes:
-            col1, col2 = st.columns(2)
-            with col1:
-                st.error(f"❌ \"{fix.get('original_phrase', '')}\"")
-            with col2:
-                st.success(f"✅ \"{fix.get('suggested_phrase', '')}\"")
-            st.caption(fix.get("reason", ""))
+        rows = [
+            f"| ❌ \"{table_cell(fix.get('original_phrase', ''))}\" "
+            f"| ✅ \"{table_cell(fix.get('suggested_phrase', ''))}\" "
+            f"| {table_cell(fix.get('reason', ''))} |"
+            for fix in fixes
+        ]
+        st.markdown("| Original | Suggested | Why |\n|---|---|---|\n" + "\n".join(rows))
 
     # General advice
     advice = rewrite.get("general_advice")
@@ -233,13 +737,59 @@ def display_rewrite(rewrite: dict):
         st.info(f"💡 **Advice:** {advice}")
 
 
+def display_risk_summary(risk: dict):
+    """Display the headline risk banner."""
+    risk_score = risk.get("overall_risk_score", 0)
+
+    if risk_score <= 3:
+        st.success(f"✅ Low Risk Message (Score: {risk_score}/10)")
+    elif risk_score <= 6:
+        st.warning(f"⚠️ Medium Risk Message (Score: {risk_score}/10)")
+    else:
+        st.error(f"🚨 High Risk Message (Score: {risk_score}/10)")
+
+
+STAGES = ("intent", "emotion", "risk", "rewrite")
+
+
+def layout_result_slots() -> dict:
+    """Lay out the risk banner and result tabs, returning an empty slot for each."""
+    slots = {"header": st.empty()}
+    tabs = st.tabs(["🎯 Intent", "💭 Emotion", "⚠️ Risk", "✨ Suggestions"])
+    for name, tab in zip(STAGES, tabs):
+        with tab:
+            slots[name] = st.empty()
+    return slots
+
+
+def display_stage(slots: dict, name: str, data: dict):
+    """Fill one stage's placeholder (and the risk banner) with its result."""
+    with slots[name].container():
+        if name == "intent":
+            display_intent(data or {})
+        elif name == "emotion":
+            display_emotion(data or {})
+        elif name == "risk":
+            display_risk(data or {})
+        elif data is not None:
+            display_rewrite(data)
+        else:
+            st.success("✅ This message has a low risk score. No rewrites suggested.")
+
+    if name == "risk":
+        with slots["header"].container():
+            display_risk_summary(data or {})
+
+
 def main():
+    inject_css()
     st.title("🛡️ Communication Intent & Risk Guard")
     st.markdown("*Analyze your messages before sending to detect intent, emotional leakage, and misinterpretation risks.*")
 
     # Load agents
     with st.spinner("Loading agents..."):
-        agents = load_agents()
+        load_agents()
+    prewarm_examples()
 
     # Sidebar
     with st.sidebar:
@@ -254,18 +804,23 @@ def main():
         """)
 
         st.header("Examples")
-        example_messages = {
-            "Select an example...": "",
-            "Passive-aggressive": "Fine. I guess I'll just do it myself since nobody else seems to care.",
-            "Accusatory": "I thought you said you'd handle this. Whatever, I'll figure it out.",
-            "Sarcastic": "Must be nice to have so much free time. Some of us are actually busy.",
-            "Professional (safe)": "Would it be possible to reschedule our meeting to Thursday? I have a conflict that just came up.",
-        }
-
-        selected_example = st.selectbox("Load example:", list(example_messages.keys()))
+        selected_example = st.selectbox("Load example:", list(EXAMPLE_MESSAGES.keys()))
+
+        st.header("Settings")
+        speculative = st.toggle(
+            "Speculative rewrites",
+            help="Start the rewrite while risk is still being assessed. Faster for risky "
+                 "messages, but spends tokens on rewrites that low-risk messages discard."
+        )
+        combined = st.toggle(
+            "Single-call analysis",
+            help="Ask for intent, emotion, risk and rewrites in one request instead of four. "
+                 "Fewer round-trips and input tokens; falls back to the separate agents if "
+                 "the combined answer is malformed."
+        )
 
     # Main input
-    default_text = example_messages.get(selected_example, "")
+    default_text = EXAMPLE_MESSAGES.get(selected_example, "")
 
     message = st.text_area(
         "Enter your message:",
@@ -279,43 +834,40 @@ def main():
         analyze_button = st.button("🔍 Analyze", type="primary", use_container_width=True)
 
     if analyze_button and message.strip():
-        with st.spinner("Running analysis pipeline..."):
-            results = run_analysis(message, agents)
-
         st.markdown("---")
+        status = st.status("Running analysis pipeline...")
+        slots = layout_result_slots()
+        shown = set()
 
-        # Risk Score Header
-        risk_score = results.get("risk", {}).get("overall_risk_score", 0)
-        risk_color = get_risk_color(risk_score)
-
-        if risk_score <= 3:
-            st.success(f"✅ Low Risk Message (Score: {risk_score}/10)")
-        elif risk_score <= 6:
-            st.warning(f"⚠️ Medium Risk Message (Score: {risk_score}/10)")
-        else:
-            st.error(f"🚨 High Risk Message (Score: {risk_score}/10)")
-
-        # Tabs for different analyses
-        tab1, tab2, tab3, tab4 = st.tabs(["🎯 Intent", "💭 Emotion", "⚠️ Risk", "✨ Suggestions"])
+        def show(name: str, data: dict):
+            shown.add(name)
+            display_stage(slots, name, data)
+            status.update(label=f"Running analysis pipeline... ({len(shown)}/4 done)")
 
-        with tab1:
-            display_intent(results.get("intent", {}))
+        results = run_analysis(message, speculative=speculative, combined=combined, on_stage=show)
 
-        with tab2:
-            display_emotion(results.get("emotion", {}))
+        # Cache hits and skipped stages never reported progress; show them now
+        for name in STAGES:
+            if name not in shown:
+                display_stage(slots, name, results.get(name))
+        status.update(label="Analysis complete", state="complete")
 
-        with tab3:
-            display_risk(results.get("risk", {}))
-
-        with tab4:
-            if "rewrite" in results:
-                display_rewrite(results["rewrite"])
-            else:
-                st.success("✅ This message has a low risk score. No rewrites suggested.")
+        st.session_state["last_msg"] = normalize_message(message)
+        st.session_state["last_results"] = results
 
     elif analyze_button:
         st.warning("Please enter a message to analyze.")
 
+    elif st.session_state.get("last_msg") == normalize_message(message):
+        # Any other widget interaction reruns the script; keep showing the last
+        # analysis straight from session state instead of going back through
+        # the caches. Streamlit drops elements that a rerun doesn't emit, so
+        # the results still have to be rendered again.
+        st.markdown("---")
+        slots = layout_result_slots()
+        for name in STAGES:
+            display_stage(slots, name, st.session_state["last_results"].get(name))
+
 
 if __name__ == "__main__":
     main()